@@ -4,22 +4,66 @@ Extract _Name trans-units where comma-separated source and target have different
 
 Usage:
     python comma_lists.py <input_file> [output_file]
+    python comma_lists.py -z <input_file> [output_file]  # Write gzip-compressed output
+    python comma_lists.py -j <N> "<glob_pattern>"        # Process matching files in parallel
 """
 
 import argparse
-import xml.etree.ElementTree as ET
+import glob
+import gzip
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree as ET
 import sys
 import os
 
 
+# Output file buffer size (1 MiB), so results are flushed in a few large writes
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+
 def extract_text(element):
     """Extract text content from an XML element."""
     if element is None:
         return ""
+    # Fast path: most source/target elements are plain text with no inline markup
+    if len(element) == 0:
+        text = element.text
+        return text.strip() if text else ""
     return ''.join(element.itertext()).strip()
 
 
-def comma_lists(input_file, output_file, include_state=False):
+def resolve_tags(input_file):
+    """
+    Detect the namespace of an XLIFF file and build its element tags.
+    
+    Returns a tuple of Clark-notation tags (trans-unit, source, target, group),
+    namespace-qualified if the root element has a namespace and bare otherwise.
+    """
+    # Open the file here so it is closed again after reading just the root start tag
+    with open(input_file, 'rb') as f:
+        for _, root in ET.iterparse(f, events=('start',)):
+            ns_uri = ET.QName(root).namespace
+            break
+    ns_prefix = f'{{{ns_uri}}}' if ns_uri is not None else ''
+    return (ns_prefix + 'trans-unit', ns_prefix + 'source',
+            ns_prefix + 'target', ns_prefix + 'group')
+
+
+def release_element(element):
+    """Free a processed element and the already-processed siblings before it."""
+    element.clear()
+    while element.getprevious() is not None:
+        del element.getparent()[0]
+
+
+def open_maybe_gz(path, gz=False):
+    """Open an output file for writing text, gzip-compressed (level 1) if gz is set."""
+    if gz:
+        return gzip.open(path, 'wt', encoding='utf-8', compresslevel=1)
+    return open(path, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE)
+
+
+def comma_lists(input_file, output_file, include_state=False, gzip_output=False):
     """
     Extract _Name trans-units where comma-separated source and target have different lengths.
     
@@ -27,135 +71,112 @@ def comma_lists(input_file, output_file, include_state=False):
         input_file: Path to the input XLIFF file from crowdin-exports/
         output_file: Path to the output TSV file
         include_state: Whether to include the target state column in output
+        gzip_output: Whether to gzip-compress the output (".gz" is appended to the file name)
     """
     try:
-        tree = ET.parse(input_file)
-        root = tree.getroot()
+        trans_unit_tag, source_tag, target_tag, group_tag = resolve_tags(input_file)
+        
+        # Stream trans-units, keeping only the text of _Abbr and _Name entries
+        abbr_source_by_id = {}  # _Abbr unit id -> source text
+        names = []  # (unit id, source text, target text, target state) for each _Name
+        for _, elem in ET.iterparse(input_file, events=('end',), tag=(group_tag, trans_unit_tag)):
+            # Groups are only closed here to release their (already processed) contents
+            if elem.tag == group_tag:
+                release_element(elem)
+                continue
+            
+            trans_unit = elem
+            
+            # Use resname for the actual identifier (XLIFF exports) or id (XLF downloads)
+            unit_id = trans_unit.get('resname', '') or trans_unit.get('id', '')
+            
+            if unit_id.endswith('_Abbr'):
+                abbr_source_by_id.setdefault(unit_id, extract_text(trans_unit.find(source_tag)))
+            elif unit_id.endswith('_Name'):
+                target_elem = trans_unit.find(target_tag)
+                names.append((
+                    unit_id,
+                    extract_text(trans_unit.find(source_tag)),
+                    extract_text(target_elem),
+                    target_elem.get('state', '') if target_elem is not None else ''
+                ))
+            
+            release_element(trans_unit)
     except Exception as e:
         print(f"Error parsing XML file '{input_file}': {e}", file=sys.stderr)
         sys.exit(1)
     
-    # Define namespace (if present)
-    namespaces = {'xliff': 'urn:oasis:names:tc:xliff:document:1.2'}
-    # Check if namespace is used
-    if root.tag.startswith('{'):
-        ns_uri = root.tag[1:root.tag.index('}')]
-        namespaces['xliff'] = ns_uri
-        use_ns = True
-    else:
-        use_ns = False
-    
-    # Find all trans-unit elements
-    if use_ns:
-        all_trans_units = root.findall('.//xliff:trans-unit', namespaces)
-    else:
-        all_trans_units = root.findall('.//trans-unit')
-    
     # Track results - separate increased and decreased
     increased_results = []  # Target has more items than source
     decreased_results = []  # Target has fewer items than source
     
-    # Process each trans-unit
-    for trans_unit in all_trans_units:
-        # Use resname for the actual identifier (XLIFF exports) or id (XLF downloads)
-        unit_id = trans_unit.get('resname', '') or trans_unit.get('id', '')
+    # Process each _Name trans-unit
+    for unit_id, source_text, target_text, target_state in names:
+        # Check if comma-separated lengths differ (only the item counts are
+        # needed, so count the commas rather than splitting)
+        source_count = source_text.count(',') + 1
+        target_count = target_text.count(',') + 1
         
-        # Only process _Name trans-units
-        if not unit_id.endswith('_Name'):
-            continue
-        
-        # Get source and target elements
-        if use_ns:
-            source_elem = trans_unit.find('xliff:source', namespaces)
-            target_elem = trans_unit.find('xliff:target', namespaces)
-        else:
-            source_elem = trans_unit.find('source')
-            target_elem = trans_unit.find('target')
-        
-        # Extract text
-        source_text = extract_text(source_elem)
-        target_text = extract_text(target_elem)
-        
-        # Get target state
-        target_state = target_elem.get('state', '') if target_elem is not None else ''
-        
-        # Check if comma-separated lengths differ
-        source_parts = [part.strip() for part in source_text.split(',')]
-        target_parts = [part.strip() for part in target_text.split(',')]
-        
-        if len(source_parts) != len(target_parts):
-            # Find the corresponding _Abbr trans-unit
+        if source_count != target_count:
+            # Look up the corresponding _Abbr source (collected while streaming)
             # The _Abbr trans-unit has the same prefix as _Name
             abbr_id = unit_id.replace('_Name', '_Abbr')
-            abbr_source = ""
-            
-            # Search for the _Abbr trans-unit
-            for tu in all_trans_units:
-                tu_id = tu.get('resname', '') or tu.get('id', '')
-                if tu_id == abbr_id:
-                    if use_ns:
-                        abbr_source_elem = tu.find('xliff:source', namespaces)
-                    else:
-                        abbr_source_elem = tu.find('source')
-                    abbr_source = extract_text(abbr_source_elem)
-                    break
+            abbr_source = abbr_source_by_id.get(abbr_id, "")
             
-            result = {
-                'abbr_source': abbr_source,
-                'name_source': source_text,
-                'name_target': target_text,
-                'target_state': target_state,
-                'source_count': len(source_parts),
-                'target_count': len(target_parts)
-            }
+            # (abbr source, name source, name target, target state, source count, target count)
+            result = (abbr_source, source_text, target_text, target_state, source_count, target_count)
             
             # Categorize by whether target increased or decreased
-            if len(target_parts) > len(source_parts):
+            if target_count > source_count:
                 increased_results.append(result)
             else:
                 decreased_results.append(result)
     
     # Write results to TSV file
+    if gzip_output and not output_file.endswith('.gz'):
+        output_file += '.gz'
+    
+    # Output columns are the leading fields of each result tuple
+    num_columns = 4 if include_state else 3
+    
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            # Write header
-            if include_state:
-                f.write('Abbr Source\tName Source\tName Target\tTarget State\n')
-            else:
-                f.write('Abbr Source\tName Source\tName Target\n')
-            
-            # Write increased length entries first
-            if increased_results:
-                f.write('\n### INCREASED LENGTH (target has MORE items than source) ###\n')
-                for result in increased_results:
-                    if include_state:
-                        f.write(f"{result['abbr_source']}\t{result['name_source']}\t"
-                               f"{result['name_target']}\t{result['target_state']}\n")
-                    else:
-                        f.write(f"{result['abbr_source']}\t{result['name_source']}\t"
-                               f"{result['name_target']}\n")
-            
-            # Write decreased length entries second
-            if decreased_results:
-                f.write('\n### DECREASED LENGTH (target has FEWER items than source) ###\n')
-                for result in decreased_results:
-                    if include_state:
-                        f.write(f"{result['abbr_source']}\t{result['name_source']}\t"
-                               f"{result['name_target']}\t{result['target_state']}\n")
-                    else:
-                        f.write(f"{result['abbr_source']}\t{result['name_source']}\t"
-                               f"{result['name_target']}\n")
+        # Assemble all lines first so the file is written in one batch
+        if include_state:
+            lines = ['Abbr Source\tName Source\tName Target\tTarget State\n']
+        else:
+            lines = ['Abbr Source\tName Source\tName Target\n']
+        
+        # Write increased length entries first
+        if increased_results:
+            lines.append('\n### INCREASED LENGTH (target has MORE items than source) ###\n')
+            lines.extend('\t'.join(result[:num_columns]) + '\n' for result in increased_results)
+        
+        # Write decreased length entries second
+        if decreased_results:
+            lines.append('\n### DECREASED LENGTH (target has FEWER items than source) ###\n')
+            lines.extend('\t'.join(result[:num_columns]) + '\n' for result in decreased_results)
+        
+        with open_maybe_gz(output_file, gzip_output) as f:
+            f.writelines(lines)
         
         total_results = len(increased_results) + len(decreased_results)
-        print(f"Successfully extracted {total_results} entries to '{output_file}'")
-        print(f"  Increased length: {len(increased_results)}")
-        print(f"  Decreased length: {len(decreased_results)}")
+        # Single print so summaries from parallel jobs don't interleave
+        print(f"Successfully extracted {total_results} entries to '{output_file}'\n"
+              f"  Increased length: {len(increased_results)}\n"
+              f"  Decreased length: {len(decreased_results)}")
     
     except Exception as e:
         print(f"Error writing output file '{output_file}': {e}", file=sys.stderr)
         sys.exit(1)
 
 
+def expand_input_files(pattern):
+    """Return the input file itself if it exists, otherwise the sorted files matching it as a glob pattern."""
+    if os.path.exists(pattern):
+        return [pattern]
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Extract _Name trans-units where comma-separated source and target have different lengths.',
@@ -165,6 +186,8 @@ Examples:
   python comma_lists.py crowdin-exports/SemanticDomains_pt-BR.xliff
   python comma_lists.py -s crowdin-exports/SemanticDomains_pt-BR.xliff
   python comma_lists.py crowdin-exports/SemanticDomains_pt-BR.xliff output.tsv
+  python comma_lists.py -z crowdin-exports/SemanticDomains_pt-BR.xliff
+  python comma_lists.py -j 4 "crowdin-exports/*.xliff"
 
 This script analyzes XLIFF files to find _Name trans-units where the number of
 comma-separated items differs between source and target. This may indicate
@@ -178,27 +201,54 @@ Output columns:
         """
     )
     
-    parser.add_argument('input_file', help='Input XLIFF file path from crowdin-exports/')
-    parser.add_argument('output_file', nargs='?', help='Output TSV file path (optional)')
+    parser.add_argument('input_file',
+                       help='Input XLIFF file path from crowdin-exports/ (or a quoted glob pattern matching several files)')
+    parser.add_argument('output_file', nargs='?', help='Output TSV file path (optional, single input file only)')
     parser.add_argument('-s', '--include-state', action='store_true',
                        help='Include target state column in output')
+    parser.add_argument('-z', '--gzip', action='store_true',
+                       help='Write gzip-compressed output (appends .gz to the output file name)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                       help='Number of input files to process in parallel (default: 1)')
     
     args = parser.parse_args()
     
+    if args.jobs < 1:
+        parser.error('-j/--jobs must be at least 1')
+    
     # Validate input file exists
-    if not os.path.exists(args.input_file):
+    input_files = expand_input_files(args.input_file)
+    if not input_files:
         print(f"Error: Input file '{args.input_file}' not found.", file=sys.stderr)
         sys.exit(1)
     
-    # Generate output filename if not provided
-    if args.output_file is None:
-        input_basename = os.path.splitext(os.path.basename(args.input_file))[0]
+    if args.output_file is not None and len(input_files) > 1:
+        print("Error: An output file can only be given for a single input file.", file=sys.stderr)
+        sys.exit(1)
+    
+    # Generate output filenames if not provided
+    if args.output_file is not None:
+        output_files = [args.output_file]
+    else:
         output_dir = 'different-name-lists'
         os.makedirs(output_dir, exist_ok=True)
-        args.output_file = os.path.join(output_dir, f'{input_basename}_comma_lists.tsv')
+        output_files = [
+            os.path.join(output_dir, f'{os.path.splitext(os.path.basename(input_file))[0]}_comma_lists.tsv')
+            for input_file in input_files
+        ]
     
-    # Process the file
-    comma_lists(args.input_file, args.output_file, args.include_state)
+    # Process the files, in parallel worker processes if requested
+    if args.jobs > 1 and len(input_files) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            futures = [
+                executor.submit(comma_lists, input_file, output_file, args.include_state, args.gzip)
+                for input_file, output_file in zip(input_files, output_files)
+            ]
+            for future in futures:
+                future.result()
+    else:
+        for input_file, output_file in zip(input_files, output_files):
+            comma_lists(input_file, output_file, args.include_state, args.gzip)
 
 
 if __name__ == '__main__':
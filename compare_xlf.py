@@ -7,143 +7,214 @@ Usage:
     python compare_xlf.py -n -s <file1> <file2> [output_file]  # Compare _Name entries (with state)
     python compare_xlf.py -d <file1> <file2> [output_file]     # Compare _Desc_0 entries (content only)
     python compare_xlf.py -d -s <file1> <file2> [output_file]  # Compare _Desc_0 entries (with state)
+    python compare_xlf.py -n -z <file1> <file2> [output_file]  # Write gzip-compressed output
 """
 
 import argparse
-import xml.etree.ElementTree as ET
+import gzip
+from lxml import etree as ET
 import sys
 import os
 
 
+# Output file buffer size (1 MiB), so results are flushed in a few large writes
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Trans-unit id suffixes that carry data used in the comparison
+WANTED_SUFFIXES = ('_Abbr', '_Name', '_Desc_0')
+
+# One shared string object per distinct target state value (see parse_xlf_file's
+# data, where the same few states repeat for every group)
+_STATE_CACHE = {}
+
+
 def extract_text(element):
     """Extract text content from an XML element."""
     if element is None:
         return ""
+    # Fast path: most source/target elements are plain text with no inline markup
+    if len(element) == 0:
+        text = element.text
+        return text.strip() if text else ""
     return ''.join(element.itertext()).strip()
 
 
-def parse_xlf_file(input_file):
+def resolve_tags(input_file):
     """
-    Parse XLF file and extract relevant data for each semantic domain.
+    Detect the namespace of an XLIFF file and build its element tags.
     
-    Returns a tuple: (dictionary with group IDs as keys, list of group IDs in order)
+    Returns a tuple of Clark-notation tags (trans-unit, source, target, group),
+    namespace-qualified if the root element has a namespace and bare otherwise.
+    """
+    # Open the file here so it is closed again after reading just the root start tag
+    with open(input_file, 'rb') as f:
+        for _, root in ET.iterparse(f, events=('start',)):
+            ns_uri = ET.QName(root).namespace
+            break
+    ns_prefix = f'{{{ns_uri}}}' if ns_uri is not None else ''
+    return (ns_prefix + 'trans-unit', ns_prefix + 'source',
+            ns_prefix + 'target', ns_prefix + 'group')
+
+
+def release_element(element):
+    """Free a processed element and the already-processed siblings before it."""
+    element.clear()
+    while element.getprevious() is not None:
+        del element.getparent()[0]
+
+
+def iter_domain_groups(input_file):
+    """
+    Stream the semantic domain groups of an XLF file.
+    
+    Yields (position, group ID, group data) tuples as each group closes, where
+    position is the index of the group's start tag. Nested groups close before
+    their parents, so callers that need document order must sort on position.
     """
     try:
-        tree = ET.parse(input_file)
-        root = tree.getroot()
+        tags = resolve_tags(input_file)
+        group_tag = tags[3]
+        
+        # Stream groups; a semantic domain group (one with a guid child) is
+        # processed when it closes, after which its subtree is released
+        start_count = 0
+        open_positions = []
+        for event, group in ET.iterparse(input_file, events=('start', 'end'), tag=group_tag):
+            if event == 'start':
+                open_positions.append(start_count)
+                start_count += 1
+                continue
+            
+            position = open_positions.pop()
+            
+            # Filter to find semantic domain groups (those with guid child);
+            # lxml matches the child tag in C, without a Python-level loop
+            if next(group.iterchildren('{*}guid'), None) is None:
+                continue
+            
+            yield position, group.get('id', ''), extract_group_data(group, tags)
+            release_element(group)
     except Exception as e:
         print(f"Error parsing XML file '{input_file}': {e}", file=sys.stderr)
         sys.exit(1)
+
+
+def parse_xlf_file(input_file, fields=None):
+    """
+    Parse XLF file and extract relevant data for each semantic domain.
     
-    # Define namespace (if present)
-    namespaces = {'xliff': 'http://www.w3.org/2001/xliff'}
-    # Check if namespace is used
-    if root.tag.startswith('{'):
-        ns_uri = root.tag[1:root.tag.index('}')]
-        namespaces['xliff'] = ns_uri
-        use_ns = True
-    else:
-        use_ns = False
+    Args:
+        input_file: Path to the XLF file
+        fields: Optional tuple of group data keys; if given, only those values
+            are kept for each group (as a tuple) instead of the full data dict
     
-    # Find all group elements
-    if use_ns:
-        all_groups = root.findall('.//xliff:group', namespaces)
-    else:
-        all_groups = root.findall('.//group')
+    Returns a tuple: (dictionary with group IDs as keys, list of group IDs in order)
+    """
+    data = {}
+    group_positions = {}  # Group ID -> position of its start tag, to preserve document order
     
-    # Filter to find semantic domain groups (those with guid child)
-    target_groups = []
-    for group in all_groups:
-        has_guid = False
-        for child in group:
-            if 'guid' in child.tag:
-                has_guid = True
-                break
-        if has_guid:
-            target_groups.append(group)
+    for position, group_id, group_data in iter_domain_groups(input_file):
+        if fields is not None:
+            group_data = tuple(group_data[field] for field in fields)
+        data[group_id] = group_data
+        group_positions[group_id] = position
     
-    # Extract data from each group
-    data = {}
-    group_order = []  # Preserve the order of groups
+    group_order = sorted(group_positions, key=group_positions.get)
     
-    for group in target_groups:
-        group_id = group.get('id', '')
-        group_order.append(group_id)  # Track order
+    return data, group_order
+
+
+def extract_group_data(group, tags):
+    """
+    Extract the _Abbr, _Name and _Desc_0 data from a semantic domain group.
+    
+    Args:
+        group: The semantic domain group element
+        tags: Element tags for the file being parsed, as returned by resolve_tags()
+    """
+    trans_unit_tag, source_tag, target_tag, group_tag = tags
+    
+    # Get all child elements
+    children = list(group)
+    
+    # Find trans-units (excluding _SubPos groups)
+    trans_units = []
+    for child in children:
+        # lxml keeps comments and processing instructions as children; their tag is not a str
+        if not isinstance(child.tag, str):
+            continue
+        child_id = child.get('id', '')
+        # Skip _SubPos groups
+        if child.tag == group_tag and '_SubPos' in child_id:
+            continue
         
-        # Get all child elements
-        children = list(group)
+        # If it's a trans-unit, add it directly
+        if child.tag == trans_unit_tag:
+            trans_units.append(child)
+        # If it's another group (like _Desc or _Qs), search within it
+        elif child.tag == group_tag:
+            trans_units.extend(child.iter(trans_unit_tag))
+    
+    # Extract relevant data
+    group_data = {
+        'abbr': '',
+        'name_source': '',
+        'name_target': '',
+        'name_target_state': '',
+        'desc_source': '',
+        'desc_target': '',
+        'desc_target_state': ''
+    }
+    
+    for trans_unit in trans_units:
+        unit_id = trans_unit.get('id', '')
         
-        # Find trans-units (excluding _SubPos groups)
-        trans_units = []
-        for child in children:
-            child_id = child.get('id', '')
-            # Skip _SubPos groups
-            if child.tag.endswith('group') and '_SubPos' in child_id:
-                continue
-            
-            # If it's a trans-unit, add it directly
-            if child.tag.endswith('trans-unit'):
-                trans_units.append(child)
-            # If it's another group (like _Desc or _Qs), search within it
-            elif child.tag.endswith('group'):
-                if use_ns:
-                    trans_units.extend(child.findall('.//xliff:trans-unit', namespaces))
-                else:
-                    trans_units.extend(child.findall('.//trans-unit'))
+        # Skip unneeded trans-units before doing any child lookups
+        if not unit_id.endswith(WANTED_SUFFIXES):
+            continue
         
-        # Extract relevant data
-        group_data = {
-            'abbr': '',
-            'name_source': '',
-            'name_target': '',
-            'name_target_state': '',
-            'desc_source': '',
-            'desc_target': '',
-            'desc_target_state': ''
-        }
+        source_elem = trans_unit.find(source_tag)
+        target_elem = trans_unit.find(target_tag)
         
-        for trans_unit in trans_units:
-            unit_id = trans_unit.get('id', '')
-            
-            if use_ns:
-                source_elem = trans_unit.find('xliff:source', namespaces)
-                target_elem = trans_unit.find('xliff:target', namespaces)
+        # Extract _Abbr
+        if unit_id.endswith('_Abbr'):
+            group_data['abbr'] = extract_text(source_elem)
+        
+        # Extract _Name
+        elif unit_id.endswith('_Name'):
+            group_data['name_source'] = extract_text(source_elem)
+            target_state = target_elem.get('state', '') if target_elem is not None else ''
+            target_state = _STATE_CACHE.setdefault(target_state, target_state)
+            group_data['name_target_state'] = target_state
+            # Use empty string if state is "needs-translation"
+            if target_state == 'needs-translation':
+                group_data['name_target'] = ''
             else:
-                source_elem = trans_unit.find('source')
-                target_elem = trans_unit.find('target')
-            
-            # Extract _Abbr
-            if unit_id.endswith('_Abbr'):
-                group_data['abbr'] = extract_text(source_elem)
-            
-            # Extract _Name
-            elif unit_id.endswith('_Name'):
-                group_data['name_source'] = extract_text(source_elem)
-                target_state = target_elem.get('state', '') if target_elem is not None else ''
-                group_data['name_target_state'] = target_state
-                # Use empty string if state is "needs-translation"
-                if target_state == 'needs-translation':
-                    group_data['name_target'] = ''
-                else:
-                    group_data['name_target'] = extract_text(target_elem)
-            
-            # Extract _Desc_0
-            elif unit_id.endswith('_Desc_0'):
-                group_data['desc_source'] = extract_text(source_elem)
-                target_state = target_elem.get('state', '') if target_elem is not None else ''
-                group_data['desc_target_state'] = target_state
-                # Use empty string if state is "needs-translation"
-                if target_state == 'needs-translation':
-                    group_data['desc_target'] = ''
-                else:
-                    group_data['desc_target'] = extract_text(target_elem)
+                group_data['name_target'] = extract_text(target_elem)
         
-        data[group_id] = group_data
+        # Extract _Desc_0
+        elif unit_id.endswith('_Desc_0'):
+            group_data['desc_source'] = extract_text(source_elem)
+            target_state = target_elem.get('state', '') if target_elem is not None else ''
+            target_state = _STATE_CACHE.setdefault(target_state, target_state)
+            group_data['desc_target_state'] = target_state
+            # Use empty string if state is "needs-translation"
+            if target_state == 'needs-translation':
+                group_data['desc_target'] = ''
+            else:
+                group_data['desc_target'] = extract_text(target_elem)
     
-    return data, group_order
+    return group_data
+
+
+def open_maybe_gz(path, gz=False):
+    """Open an output file for writing text, gzip-compressed (level 1) if gz is set."""
+    if gz:
+        return gzip.open(path, 'wt', encoding='utf-8', compresslevel=1)
+    return open(path, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE)
 
 
-def compare_files(file1, file2, compare_type, output_file=None, include_state=False):
+def compare_files(file1, file2, compare_type, output_file=None, include_state=False, gzip_output=False):
     """
     Compare two XLF files and identify changes in translations.
     
@@ -153,12 +224,17 @@ def compare_files(file1, file2, compare_type, output_file=None, include_state=Fa
         compare_type: Either 'name' or 'description'
         output_file: Optional output file path
         include_state: Whether to check and output state information
+        gzip_output: Whether to gzip-compress the output (".gz" is appended to the file name)
     """
-    print(f"Parsing {file1}...")
-    data1, order1 = parse_xlf_file(file1)
+    # Fields compared between the two files
+    if compare_type == 'name':
+        target_key, state_key = 'name_target', 'name_target_state'
+    else:
+        target_key, state_key = 'desc_target', 'desc_target_state'
     
-    print(f"Parsing {file2}...")
-    data2, order2 = parse_xlf_file(file2)
+    # Only the compared target and state are kept for the older file
+    print(f"Parsing {file1}...")
+    data1, _ = parse_xlf_file(file1, fields=(target_key, state_key))
     
     # Set default output file if not specified
     if output_file is None:
@@ -170,90 +246,51 @@ def compare_files(file1, file2, compare_type, output_file=None, include_state=Fa
         suffix = '_names' if compare_type == 'name' else '_descriptions'
         output_file = os.path.join(output_dir, f'{file1_basename}_vs_{file2_basename}{suffix}.tsv')
     
-    # Find changes
-    changes = []
+    if gzip_output and not output_file.endswith('.gz'):
+        output_file += '.gz'
     
-    # Get all group IDs that appear in both files, preserving order from file2
-    common_groups = set(data1.keys()) & set(data2.keys())
+    # Stream the newer file, diffing each group that appears in both files as it closes
+    print(f"Parsing {file2}...")
+    changes = []  # (position in file2, row tuple)
     
-    # Iterate in the order they appear in file2
-    for group_id in order2:
-        if group_id not in common_groups:
+    for position, group_id, d2 in iter_domain_groups(file2):
+        if group_id not in data1:
             continue
-        d1 = data1[group_id]
-        d2 = data2[group_id]
+        target_before, state_before = data1[group_id]
         
-        if compare_type == 'name':
-            # Check if _Name target content has changed (and optionally state)
-            content_changed = d1['name_target'] != d2['name_target']
-            state_changed = d1['name_target_state'] != d2['name_target_state'] if include_state else False
-            
-            if content_changed or state_changed:
-                change_data = {
-                    'abbr': d2['abbr'],
-                    'name_source': d2['name_source'],
-                    'content_before': d1['name_target'],
-                    'content_after': d2['name_target']
-                }
-                if include_state:
-                    change_data['state_before'] = d1['name_target_state']
-                    change_data['state_after'] = d2['name_target_state']
-                changes.append(change_data)
+        # Check if the target content has changed (and optionally state)
+        content_changed = target_before != d2[target_key]
+        state_changed = state_before != d2[state_key] if include_state else False
         
-        elif compare_type == 'description':
-            # Check if _Desc_0 target content has changed (and optionally state)
-            content_changed = d1['desc_target'] != d2['desc_target']
-            state_changed = d1['desc_target_state'] != d2['desc_target_state'] if include_state else False
-            
-            if content_changed or state_changed:
-                change_data = {
-                    'abbr': d2['abbr'],
-                    'name_source': d2['name_source'],
-                    'desc_source': d2['desc_source'],
-                    'content_before': d1['desc_target'],
-                    'content_after': d2['desc_target']
-                }
-                if include_state:
-                    change_data['state_before'] = d1['desc_target_state']
-                    change_data['state_after'] = d2['desc_target_state']
-                changes.append(change_data)
+        if content_changed or state_changed:
+            # Row tuple in output column order
+            if compare_type == 'description':
+                sources = (d2['abbr'], d2['name_source'], d2['desc_source'])
+            else:
+                sources = (d2['abbr'], d2['name_source'])
+            states = (state_before, d2[state_key]) if include_state else ()
+            changes.append((position, sources + states + (target_before, d2[target_key])))
+    
+    # Nested groups close before their parents; restore the order they appear in file2
+    changes.sort(key=lambda change: change[0])
+    changes = [row for _, row in changes]
+    
+    # Output column headers, matching the row tuples built above
+    headers = ['Abbr', 'Name Source']
+    if compare_type == 'description':
+        headers.append('Desc Source')
+    if include_state:
+        headers += ['State Before', 'State After']
+    headers += ['Content Before', 'Content After']
     
     # Write results to file
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            if compare_type == 'name':
-                # Write header
-                if include_state:
-                    f.write("Abbr\tName Source\tState Before\tState After\tContent Before\tContent After\n")
-                else:
-                    f.write("Abbr\tName Source\tContent Before\tContent After\n")
-                
-                # Write data
-                for change in changes:
-                    if include_state:
-                        f.write(f"{change['abbr']}\t{change['name_source']}\t"
-                               f"{change['state_before']}\t{change['state_after']}\t"
-                               f"{change['content_before']}\t{change['content_after']}\n")
-                    else:
-                        f.write(f"{change['abbr']}\t{change['name_source']}\t"
-                               f"{change['content_before']}\t{change['content_after']}\n")
-            
-            elif compare_type == 'description':
-                # Write header
-                if include_state:
-                    f.write("Abbr\tName Source\tDesc Source\tState Before\tState After\tContent Before\tContent After\n")
-                else:
-                    f.write("Abbr\tName Source\tDesc Source\tContent Before\tContent After\n")
-                
-                # Write data
-                for change in changes:
-                    if include_state:
-                        f.write(f"{change['abbr']}\t{change['name_source']}\t{change['desc_source']}\t"
-                               f"{change['state_before']}\t{change['state_after']}\t"
-                               f"{change['content_before']}\t{change['content_after']}\n")
-                    else:
-                        f.write(f"{change['abbr']}\t{change['name_source']}\t{change['desc_source']}\t"
-                               f"{change['content_before']}\t{change['content_after']}\n")
+        # Assemble all lines first so the file is written in one batch
+        lines = ['\t'.join(headers) + '\n']
+        lines.extend('\t'.join(change) + '\n' for change in changes)
+        
+        with open_maybe_gz(output_file, gzip_output) as f:
+            f.writelines(lines)
         
         print(f"\nFound {len(changes)} changed entries")
         print(f"Results written to '{output_file}'")
@@ -272,6 +309,7 @@ Examples:
   python compare_xlf.py -n crowdin-downloads/file1.xlf crowdin-downloads/file2.xlf
   python compare_xlf.py -n -s crowdin-downloads/file1.xlf crowdin-downloads/file2.xlf
   python compare_xlf.py -d crowdin-downloads/old.xlf crowdin-downloads/new.xlf output.tsv
+  python compare_xlf.py -n -z crowdin-downloads/file1.xlf crowdin-downloads/file2.xlf
         """
     )
     
@@ -284,6 +322,8 @@ Examples:
     
     parser.add_argument('-s', '--include-state', action='store_true',
                        help='Include target state columns in output (checks for state changes)')
+    parser.add_argument('-z', '--gzip', action='store_true',
+                       help='Write gzip-compressed output (appends .gz to the output file name)')
     
     parser.add_argument('file1', help='First (older) XLF file path')
     parser.add_argument('file2', help='Second (newer) XLF file path')
@@ -305,7 +345,7 @@ Examples:
     compare_type = 'name' if args.names else 'description'
     
     # Compare files
-    compare_files(args.file1, args.file2, compare_type, args.output_file, args.include_state)
+    compare_files(args.file1, args.file2, compare_type, args.output_file, args.include_state, args.gzip)
 
 
 if __name__ == '__main__':
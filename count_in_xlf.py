@@ -4,113 +4,152 @@ Count trans-units within XLF file _Poss groups by target state.
 
 Usage:
     python count_in_xlf.py <input_file>
+    python count_in_xlf.py -j <N> "<glob_pattern>"  # Process matching files in parallel
 """
 
 import argparse
-import xml.etree.ElementTree as ET
+import glob
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree as ET
+import re
 import sys
 import os
-from collections import defaultdict
+from collections import Counter, defaultdict
+
+
+# Trans-unit id suffixes that are counted
+COUNTED_SUFFIXES = ('_Name', '_Desc_0')
+
+# Splits a string into its digit and non-digit runs for natural sorting
+_NAT_RE = re.compile(r'(\d+)')
+
+# Shared string objects for target state values; only a handful of distinct
+# states exist, so reusing one object per value keeps dict keys and
+# comparisons on the identity fast path
+_STATE_CACHE = {}
 
 
 def extract_text(element):
     """Extract text content from an XML element."""
     if element is None:
         return ""
+    # Fast path: most source/target elements are plain text with no inline markup
+    if len(element) == 0:
+        text = element.text
+        return text.strip() if text else ""
     return ''.join(element.itertext()).strip()
 
 
-def count_in_xlf(input_file):
+def resolve_tags(input_file):
+    """
+    Detect the namespace of an XLIFF file and build its element tags.
+    
+    Returns a tuple of Clark-notation tags (trans-unit, source, target, group),
+    namespace-qualified if the root element has a namespace and bare otherwise.
+    """
+    # Open the file here so it is closed again after reading just the root start tag
+    with open(input_file, 'rb') as f:
+        for _, root in ET.iterparse(f, events=('start',)):
+            ns_uri = ET.QName(root).namespace
+            break
+    ns_prefix = f'{{{ns_uri}}}' if ns_uri is not None else ''
+    return (ns_prefix + 'trans-unit', ns_prefix + 'source',
+            ns_prefix + 'target', ns_prefix + 'group')
+
+
+def release_element(element):
+    """Free a processed element and the already-processed siblings before it."""
+    element.clear()
+    while element.getprevious() is not None:
+        del element.getparent()[0]
+
+
+def natural_sort_key(s):
+    """Sort key that handles numbers naturally"""
+    return [int(text) if text.isdigit() else text.lower()
+            for text in _NAT_RE.split(s)]
+
+
+def build_report(input_file):
     """
     Count _Name and _Desc_0 trans-units within _Poss groups by target state.
     Results are broken down by each immediate child of a _Poss group.
     
     Args:
         input_file: Path to the input XLF file from crowdin-downloads/
+    
+    Returns the formatted report text.
     """
+    # Flat counts keyed on (poss_child_id, 'name' or 'desc', state)
+    counts = Counter()
+    
     try:
-        tree = ET.parse(input_file)
-        root = tree.getroot()
+        trans_unit_tag, _, target_tag, group_tag = resolve_tags(input_file)
+        
+        # Stream groups and trans-units, tracking which immediate child of the
+        # (first) _Poss group is currently open
+        group_depth = 0
+        poss_depth = None  # Depth of the _Poss group once it has been seen
+        poss_done = False
+        child_id = None  # Id of the open immediate child of the _Poss group
+        
+        for event, elem in ET.iterparse(input_file, events=('start', 'end'),
+                                        tag=(group_tag, trans_unit_tag)):
+            if elem.tag == group_tag:
+                if event == 'start':
+                    group_depth += 1
+                    if poss_depth is None:
+                        if '_Poss' in elem.get('id', ''):
+                            poss_depth = group_depth
+                    elif not poss_done and group_depth == poss_depth + 1:
+                        child_id = elem.get('id', '')
+                else:
+                    if group_depth == poss_depth:
+                        poss_done = True
+                    elif group_depth == (poss_depth or 0) + 1:
+                        child_id = None
+                    group_depth -= 1
+                    # Its trans-units have all been counted, so drop the emptied group too
+                    release_element(elem)
+                continue
+            
+            if event != 'end':
+                continue
+            
+            # Only _Name and _Desc_0 trans-units are counted; check the id
+            # before doing any child lookups
+            unit_id = elem.get('id', '') if child_id is not None else ''
+            if unit_id.endswith(COUNTED_SUFFIXES):
+                # Get target element and its state
+                target_elem = elem.find(target_tag)
+                target_state = target_elem.get('state', '(no state)') if target_elem is not None else '(no target)'
+                target_state = _STATE_CACHE.setdefault(target_state, target_state)
+                
+                # Count _Name and _Desc_0 trans-units
+                kind = 'name' if unit_id.endswith('_Name') else 'desc'
+                counts[(child_id, kind, target_state)] += 1
+            
+            release_element(elem)
     except Exception as e:
         print(f"Error parsing XML file '{input_file}': {e}", file=sys.stderr)
         sys.exit(1)
     
-    # Define namespace (if present)
-    namespaces = {'xliff': 'http://www.w3.org/2001/xliff'}
-    # Check if namespace is used
-    if root.tag.startswith('{'):
-        ns_uri = root.tag[1:root.tag.index('}')]
-        namespaces['xliff'] = ns_uri
-        use_ns = True
-    else:
-        use_ns = False
-    
-    # Find all group elements
-    if use_ns:
-        all_groups = root.findall('.//xliff:group', namespaces)
-    else:
-        all_groups = root.findall('.//group')
-    
-    # Find the _Poss group
-    poss_group = None
-    for group in all_groups:
-        if '_Poss' in group.get('id', ''):
-            poss_group = group
-            break
-    
-    if poss_group is None:
+    if poss_depth is None:
         print("Error: No _Poss group found in file", file=sys.stderr)
         sys.exit(1)
     
-    # Get immediate children of _Poss group
-    if use_ns:
-        poss_children = poss_group.findall('xliff:group', namespaces)
-    else:
-        poss_children = poss_group.findall('group')
+    # Pivot into {poss_child_id: {'name': {state: count}, 'desc': {state: count}}}
+    poss_data = defaultdict(lambda: {'name': {}, 'desc': {}})
+    for (child_id, kind, state), count in counts.items():
+        poss_data[child_id][kind][state] = count
     
-    # Structure: {poss_child_id: {'name': {state: count}, 'desc': {state: count}}}
-    poss_data = defaultdict(lambda: {'name': defaultdict(int), 'desc': defaultdict(int)})
-    
-    # Process each immediate child of the _Poss group
-    for child_group in poss_children:
-        child_id = child_group.get('id', '')
-        
-        # Find all trans-units in this child group
-        if use_ns:
-            trans_units = child_group.findall('.//xliff:trans-unit', namespaces)
-        else:
-            trans_units = child_group.findall('.//trans-unit')
-        
-        for trans_unit in trans_units:
-            unit_id = trans_unit.get('id', '')
-            
-            # Get target element and its state
-            if use_ns:
-                target_elem = trans_unit.find('xliff:target', namespaces)
-            else:
-                target_elem = trans_unit.find('target')
-            
-            target_state = target_elem.get('state', '(no state)') if target_elem is not None else '(no target)'
-            
-            # Count _Name trans-units
-            if unit_id.endswith('_Name'):
-                poss_data[child_id]['name'][target_state] += 1
-            
-            # Count _Desc_0 trans-units
-            elif unit_id.endswith('_Desc_0'):
-                poss_data[child_id]['desc'][target_state] += 1
-    
-    # Display results
-    print(f"Input file: {input_file}")
-    print(f"Found {len(poss_data)} _Poss child group(s)\n")
+    # Display results (collected and returned as one block of text)
+    out = [
+        f"Input file: {input_file}",
+        f"Found {len(poss_data)} _Poss child group(s)\n"
+    ]
     
     # Sort poss_child_ids naturally
-    def natural_sort_key(s):
-        """Sort key that handles numbers naturally"""
-        import re
-        return [int(text) if text.isdigit() else text.lower()
-                for text in re.split(r'(\d+)', s)]
-    
     sorted_poss_ids = sorted(poss_data.keys(), key=natural_sort_key)
     
     for poss_id in sorted_poss_ids:
@@ -118,41 +157,41 @@ def count_in_xlf(input_file):
         name_counts = data['name']
         desc_counts = data['desc']
         
-        print("=" * 80)
-        print(f"{poss_id}")
-        print("=" * 80)
+        out.append("=" * 80)
+        out.append(f"{poss_id}")
+        out.append("=" * 80)
         
         # Display _Name counts
         if name_counts:
             total_name = sum(name_counts.values())
-            print(f"_Name trans-units ({total_name} total):")
-            print("-" * 80)
+            out.append(f"_Name trans-units ({total_name} total):")
+            out.append("-" * 80)
             for state in sorted(name_counts.keys()):
                 count = name_counts[state]
                 percentage = (count / total_name * 100) if total_name > 0 else 0
-                print(f"  {state:30s}: {count:4d} ({percentage:5.1f}%)")
+                out.append(f"  {state:30s}: {count:4d} ({percentage:5.1f}%)")
         
         # Display _Desc_0 counts
         if desc_counts:
             total_desc = sum(desc_counts.values())
             if name_counts:
-                print()  # Add spacing between _Name and _Desc_0
-            print(f"_Desc_0 trans-units ({total_desc} total):")
-            print("-" * 80)
+                out.append('')  # Add spacing between _Name and _Desc_0
+            out.append(f"_Desc_0 trans-units ({total_desc} total):")
+            out.append("-" * 80)
             for state in sorted(desc_counts.keys()):
                 count = desc_counts[state]
                 percentage = (count / total_desc * 100) if total_desc > 0 else 0
-                print(f"  {state:30s}: {count:4d} ({percentage:5.1f}%)")
+                out.append(f"  {state:30s}: {count:4d} ({percentage:5.1f}%)")
         
         if not name_counts and not desc_counts:
-            print("  No _Name or _Desc_0 trans-units found")
+            out.append("  No _Name or _Desc_0 trans-units found")
         
-        print()  # Blank line between groups
+        out.append('')  # Blank line between groups
     
     # Calculate and display totals across all children
-    print("=" * 80)
-    print("TOTALS ACROSS ALL CHILDREN")
-    print("=" * 80)
+    out.append("=" * 80)
+    out.append("TOTALS ACROSS ALL CHILDREN")
+    out.append("=" * 80)
     
     total_name_counts = defaultdict(int)
     total_desc_counts = defaultdict(int)
@@ -166,31 +205,51 @@ def count_in_xlf(input_file):
     # Display _Name totals
     if total_name_counts:
         grand_total_name = sum(total_name_counts.values())
-        print(f"_Name trans-units ({grand_total_name} total):")
-        print("-" * 80)
+        out.append(f"_Name trans-units ({grand_total_name} total):")
+        out.append("-" * 80)
         for state in sorted(total_name_counts.keys()):
             count = total_name_counts[state]
             percentage = (count / grand_total_name * 100) if grand_total_name > 0 else 0
-            print(f"  {state:30s}: {count:4d} ({percentage:5.1f}%)")
+            out.append(f"  {state:30s}: {count:4d} ({percentage:5.1f}%)")
     
     # Display _Desc_0 totals
     if total_desc_counts:
         grand_total_desc = sum(total_desc_counts.values())
         if total_name_counts:
-            print()  # Add spacing between _Name and _Desc_0
-        print(f"_Desc_0 trans-units ({grand_total_desc} total):")
-        print("-" * 80)
+            out.append('')  # Add spacing between _Name and _Desc_0
+        out.append(f"_Desc_0 trans-units ({grand_total_desc} total):")
+        out.append("-" * 80)
         for state in sorted(total_desc_counts.keys()):
             count = total_desc_counts[state]
             percentage = (count / grand_total_desc * 100) if grand_total_desc > 0 else 0
-            print(f"  {state:30s}: {count:4d} ({percentage:5.1f}%)")
+            out.append(f"  {state:30s}: {count:4d} ({percentage:5.1f}%)")
     
     if total_name_counts or total_desc_counts:
-        print()
-        print("=" * 80)
+        out.append('')
+        out.append("=" * 80)
         grand_total_all = sum(total_name_counts.values()) + sum(total_desc_counts.values())
-        print(f"Grand Total: {grand_total_all} trans-units across all children")
-        print("=" * 80)
+        out.append(f"Grand Total: {grand_total_all} trans-units across all children")
+        out.append("=" * 80)
+    
+    return '\n'.join(out) + '\n'
+
+
+def count_in_xlf(input_file):
+    """
+    Count _Name and _Desc_0 trans-units within _Poss groups by target state
+    and write the report to stdout in one batch.
+    
+    Args:
+        input_file: Path to the input XLF file from crowdin-downloads/
+    """
+    sys.stdout.write(build_report(input_file))
+
+
+def expand_input_files(pattern):
+    """Return the input file itself if it exists, otherwise the sorted files matching it as a glob pattern."""
+    if os.path.exists(pattern):
+        return [pattern]
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
 
 
 def main():
@@ -200,22 +259,41 @@ def main():
         epilog="""
 Examples:
   python count_in_xlf.py crowdin-downloads/SemanticDomains.pt-BR.xlf
+  python count_in_xlf.py -j 4 "crowdin-downloads/*.xlf"
   
 Output is organized by each immediate _Poss child (e.g., 1_Poss_1, 1_Poss_2, etc.)
         """
     )
     
-    parser.add_argument('input_file', help='Input XLF file path from crowdin-downloads/')
+    parser.add_argument('input_file',
+                       help='Input XLF file path from crowdin-downloads/ (or a quoted glob pattern matching several files)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                       help='Number of input files to process in parallel (default: 1)')
     
     args = parser.parse_args()
     
+    if args.jobs < 1:
+        parser.error('-j/--jobs must be at least 1')
+    
     # Validate input file exists
-    if not os.path.exists(args.input_file):
+    input_files = expand_input_files(args.input_file)
+    if not input_files:
         print(f"Error: Input file '{args.input_file}' not found.", file=sys.stderr)
         sys.exit(1)
     
-    # Count trans-units
-    count_in_xlf(args.input_file)
+    # Count trans-units, in parallel worker processes if requested; reports
+    # are written in input order, separated by a blank line
+    if args.jobs > 1 and len(input_files) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            for i, report in enumerate(executor.map(build_report, input_files)):
+                if i:
+                    sys.stdout.write('\n')
+                sys.stdout.write(report)
+    else:
+        for i, input_file in enumerate(input_files):
+            if i:
+                sys.stdout.write('\n')
+            count_in_xlf(input_file)
 
 
 if __name__ == '__main__':
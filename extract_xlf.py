@@ -16,14 +16,99 @@ import re
 import sys
 
 
+# Output file buffer size (1 MiB), so results are flushed in a few large writes
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Trans-unit id suffixes that can be extracted (_Qs_#_Q labels the question pattern)
+SUFFIX_NAME = '_Name'
+SUFFIX_DESC = '_Desc_0'
+SUFFIX_QUESTION = '_Qs_#_Q'
+_QS_RE = re.compile(r'_Qs_\d+_Q$')
+
+
+def id_suffix(unit_id):
+    """
+    Return which extractable suffix a trans-unit id ends with, or None.
+    
+    Dispatches on the last '_'-separated token, so ids that end in anything
+    else are rejected with a single rpartition.
+    """
+    _, sep, tail = unit_id.rpartition('_')
+    if not sep:
+        return None
+    if tail == 'Name':
+        return SUFFIX_NAME
+    if tail == '0':
+        return SUFFIX_DESC if unit_id.endswith(SUFFIX_DESC) else None
+    if tail == 'Q':
+        return SUFFIX_QUESTION if _QS_RE.search(unit_id) else None
+    return None
+
+
 def extract_text(element):
     """Extract text content from an XML element, preserving inner structure."""
     if element is None:
         return ""
-    # Get all text content including text in child elements
+    # Fast path: most source/target elements are plain text with no inline markup
+    if len(element) == 0:
+        text = element.text
+        return text.strip() if text else ""
+    # Get all text content including text in child elements (e.g. <g>/<x> tags)
     return ''.join(element.itertext()).strip()
 
 
+def detect_namespace(input_file):
+    """Return the namespace URI of the root element, or None if it has no namespace."""
+    # Open the file here so it is closed again after reading just the root start tag
+    with open(input_file, 'rb') as f:
+        for _, root in ET.iterparse(f, events=('start',)):
+            if root.tag.startswith('{'):
+                return root.tag[1:root.tag.index('}')]
+            return None
+
+
+def iter_domain_groups(input_file, group_tag):
+    """
+    Stream the semantic domain groups (groups with a guid child) of an XLF file.
+    
+    Yields (position, group) as each group closes, where position is the index
+    of the group's start tag in document order. Once the caller is done with a
+    group it is cleared and detached from its parent, so only the part of the
+    tree being processed is kept in memory.
+    """
+    try:
+        open_elements = []  # (element, start position) for each currently open element
+        start_count = 0
+        for event, elem in ET.iterparse(input_file, events=('start', 'end')):
+            if event == 'start':
+                open_elements.append((elem, start_count))
+                start_count += 1
+                continue
+            
+            _, position = open_elements.pop()
+            if elem.tag != group_tag:
+                continue
+            
+            # Check if this group has a guid child (semantic domain marker)
+            has_guid = False
+            for child in elem:
+                tag = child.tag
+                if tag == 'guid' or tag.endswith('}guid'):
+                    has_guid = True
+                    break
+            if not has_guid:
+                continue
+            
+            yield position, elem
+            
+            elem.clear()
+            if open_elements:
+                open_elements[-1][0].remove(elem)
+    except Exception as e:
+        print(f"Error parsing XML file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
 def extract_data(input_file, pattern_type, output_file=None):
     """
     Extract source and target content from XLF file.
@@ -33,34 +118,35 @@ def extract_data(input_file, pattern_type, output_file=None):
         pattern_type: Type of pattern to match ('name', 'description', or 'question')
         output_file: Optional output file path (defaults to stdout or auto-generated name)
     """
-    # Define patterns based on type
+    # Define id suffixes based on type
     if pattern_type == 'name':
-        pattern = re.compile(r'_Name$')
+        main_suffix = SUFFIX_NAME
         default_suffix = '_names.txt'
         include_extra = False
-        extra_pattern = None
+        extra_suffix = None
     elif pattern_type == 'name_with_desc':
-        pattern = re.compile(r'_Name$')
+        main_suffix = SUFFIX_NAME
         default_suffix = '_names_descriptions.txt'
         include_extra = True
-        extra_pattern = re.compile(r'_Desc_0$')
+        extra_suffix = SUFFIX_DESC
     elif pattern_type == 'description':
-        pattern = re.compile(r'_Desc_0$')
+        main_suffix = SUFFIX_DESC
         default_suffix = '_descriptions.txt'
         include_extra = False
-        extra_pattern = None
+        extra_suffix = None
     elif pattern_type == 'description_with_name':
-        pattern = re.compile(r'_Desc_0$')
+        main_suffix = SUFFIX_DESC
         default_suffix = '_descriptions_names.txt'
         include_extra = True
-        extra_pattern = re.compile(r'_Name$')
+        extra_suffix = SUFFIX_NAME
     elif pattern_type == 'question':
-        pattern = re.compile(r'_Qs_\d+_Q$')
+        main_suffix = SUFFIX_QUESTION
         default_suffix = '_questions.txt'
         include_extra = False
-        extra_pattern = None
+        extra_suffix = None
     else:
         raise ValueError(f"Unknown pattern type: {pattern_type}")
+    stop_when_filled = pattern_type != 'question'
     
     # Set output file if not specified
     if output_file is None:
@@ -73,132 +159,114 @@ def extract_data(input_file, pattern_type, output_file=None):
         os.makedirs(output_dir, exist_ok=True)
         output_file = os.path.join(output_dir, output_basename)
     
-    # Parse the XML file
+    # Detect namespace (if present) from the root element
     try:
-        tree = ET.parse(input_file)
-        root = tree.getroot()
+        ns_uri = detect_namespace(input_file)
     except Exception as e:
         print(f"Error parsing XML file: {e}", file=sys.stderr)
         sys.exit(1)
     
-    # Define namespace (if present)
-    namespaces = {'xliff': 'http://www.w3.org/2001/xliff'}
-    # Check if namespace is used
-    if root.tag.startswith('{'):
-        ns_uri = root.tag[1:root.tag.index('}')]
-        namespaces['xliff'] = ns_uri
-        use_ns = True
-    else:
-        use_ns = False
+    # Qualified tags, so children can be dispatched with a plain string compare
+    ns_prefix = f'{{{ns_uri}}}' if ns_uri is not None else ''
+    trans_unit_tag = ns_prefix + 'trans-unit'
+    group_tag = ns_prefix + 'group'
+    source_tag = ns_prefix + 'source'
+    target_tag = ns_prefix + 'target'
     
-    # Find all group elements that contain sil:guid (semantic domain groups)
-    if use_ns:
-        all_groups = root.findall('.//xliff:group', namespaces)
-    else:
-        all_groups = root.findall('.//group')
+    # Extract matching entries, streaming one semantic domain group at a time
+    entries = []  # (position, group ID, output line or None if the group lacks the desired element)
     
-    # Filter to find semantic domain groups (those with guid child)
-    target_groups = []
-    for group in all_groups:
-        # Check if this group has a guid child (semantic domain marker)
-        has_guid = False
-        for child in group:
-            if 'guid' in child.tag:
-                has_guid = True
-                break
-        if has_guid:
-            target_groups.append(group)
-    
-    # Extract matching entries
-    results = []
-    missing_count = 0
-    
-    for group in target_groups:
+    for position, group in iter_domain_groups(input_file, group_tag):
         group_id = group.get('id', '')
         
-        # Get all child elements
-        children = list(group)
-        
-        # First, find the _Abbr trans-unit to get the domain number
+        # Walk the group's children once, filling the _Abbr text (for the domain
+        # number) and the matching fields as trans-units are reached
         abbr_text = ""
-        for child in children:
-            if child.tag.endswith('trans-unit'):
-                child_id = child.get('id', '')
-                if child_id.endswith('_Abbr'):
-                    if use_ns:
-                        abbr_source = child.find('xliff:source', namespaces)
-                    else:
-                        abbr_source = child.find('source')
-                    abbr_text = extract_text(abbr_source)
-                    break
-        
-        # Filter out _SubPos groups and only search in non-SubPos children
-        trans_units = []
-        for child in children:
-            child_id = child.get('id', '')
-            # Skip _SubPos groups
-            if child.tag.endswith('group') and '_SubPos' in child_id:
-                continue
-            
-            # If it's a trans-unit, add it directly
-            if child.tag.endswith('trans-unit'):
-                trans_units.append(child)
-            # If it's another group (like _Desc or _Qs), search within it
-            elif child.tag.endswith('group'):
-                if use_ns:
-                    trans_units.extend(child.findall('.//xliff:trans-unit', namespaces))
-                else:
-                    trans_units.extend(child.findall('.//trans-unit'))
-        
-        # Look for matching trans-unit
+        abbr_found = False
         found = False
         source_text = ""
         target_text = ""
         extra_source_text = ""
+        extra_found = not include_extra
         
-        for trans_unit in trans_units:
-            unit_id = trans_unit.get('id', '')
+        for child in group:
+            tag = child.tag
+            if tag == trans_unit_tag:
+                if not abbr_found and child.get('id', '').endswith('_Abbr'):
+                    abbr_text = extract_text(child.find(source_tag))
+                    abbr_found = True
+                trans_units = (child,)
+            # If it's another group (like _Desc or _Qs), search within it; skip _SubPos groups
+            elif tag == group_tag and '_SubPos' not in child.get('id', ''):
+                trans_units = child.iter(trans_unit_tag)
+            else:
+                continue
             
-            if pattern.search(unit_id):
-                if use_ns:
-                    source_elem = trans_unit.find('xliff:source', namespaces)
-                    target_elem = trans_unit.find('xliff:target', namespaces)
-                else:
-                    source_elem = trans_unit.find('source')
-                    target_elem = trans_unit.find('target')
+            for trans_unit in trans_units:
+                # One suffix lookup decides both the main and the extra field
+                suffix = id_suffix(trans_unit.get('id', ''))
+                if suffix is None:
+                    continue
+                is_match = suffix == main_suffix
+                # Look for extra field if needed
+                is_extra = include_extra and suffix == extra_suffix
+                if not (is_match or is_extra):
+                    continue
+                
+                # Pick source and target in a single pass over the trans-unit
+                source_elem = target_elem = None
+                for elem in trans_unit:
+                    elem_tag = elem.tag
+                    if elem_tag == source_tag:
+                        source_elem = elem
+                    elif elem_tag == target_tag:
+                        target_elem = elem
                 
-                source_text = extract_text(source_elem)
-                target_text = extract_text(target_elem)
-                found = True
+                if is_match:
+                    source_text = extract_text(source_elem)
+                    target_text = extract_text(target_elem)
+                    found = True
+                if is_extra:
+                    extra_source_text = extract_text(source_elem)
+                    extra_found = True
             
-            # Look for extra field if needed
-            if include_extra and extra_pattern.search(unit_id):
-                if use_ns:
-                    extra_source_elem = trans_unit.find('xliff:source', namespaces)
-                else:
-                    extra_source_elem = trans_unit.find('source')
-                extra_source_text = extract_text(extra_source_elem)
+            # A domain has a single _Name and _Desc_0, so stop once every field is
+            # filled (questions keep going: the last _Qs_#_Q in the group is used)
+            if stop_when_filled and abbr_found and found and extra_found:
+                break
         
+        # Format the output line right away, so no per-row tuple is kept around
         if found:
             if include_extra:
                 # For description_with_name, put name source before description columns
                 if pattern_type == 'description_with_name':
-                    results.append((abbr_text, extra_source_text, source_text, target_text))
+                    line = f"{abbr_text}\t{extra_source_text}\t{source_text}\t{target_text}\n"
                 else:
-                    results.append((abbr_text, source_text, target_text, extra_source_text))
+                    line = f"{abbr_text}\t{source_text}\t{target_text}\t{extra_source_text}\n"
             else:
-                results.append((abbr_text, source_text, target_text))
+                line = f"{abbr_text}\t{source_text}\t{target_text}\n"
+        else:
+            line = None
+        entries.append((position, group_id, line))
+    
+    # Nested groups close before their parents; restore document order
+    entries.sort(key=lambda entry: entry[0])
+    
+    lines = []
+    missing_count = 0
+    for _, group_id, line in entries:
+        if line is not None:
+            lines.append(line)
         else:
             print(f"Warning: Group '{group_id}' lacks the desired element")
             missing_count += 1
     
     # Write results to output file
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for result in results:
-                f.write("\t".join(result) + "\n")
+        with open(output_file, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as f:
+            f.writelines(lines)
         
-        print(f"\nExtracted {len(results)} entries to '{output_file}'")
+        print(f"\nExtracted {len(lines)} entries to '{output_file}'")
         if missing_count > 0:
             print(f"Warning: {missing_count} group(s) were missing the desired element")
     except Exception as e:
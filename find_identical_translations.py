@@ -11,6 +11,15 @@ import xml.etree.ElementTree as ET
 import sys
 import os
 
+# Output file buffer size (1 MiB), so results are flushed in a few large writes
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# XLIFF 1.2 namespace and the namespace-qualified tags looked up in it
+XLIFF_NS = 'urn:oasis:names:tc:xliff:document:1.2'
+TRANS_UNIT_TAG = f'{{{XLIFF_NS}}}trans-unit'
+SOURCE_TAG = f'{{{XLIFF_NS}}}source'
+TARGET_TAG = f'{{{XLIFF_NS}}}target'
+
 def find_identical_translations(xliff_file):
     """
     Find <trans-unit> elements where translated="yes" and <source> is identical to <target>
@@ -19,11 +28,8 @@ def find_identical_translations(xliff_file):
     tree = ET.parse(xliff_file)
     root = tree.getroot()
     
-    # Define the namespace
-    ns = {'xliff': 'urn:oasis:names:tc:xliff:document:1.2'}
-    
     # Find all trans-unit elements
-    trans_units = root.findall('.//xliff:trans-unit', ns)
+    trans_units = root.iter(TRANS_UNIT_TAG)
     
     results = []
     
@@ -38,8 +44,8 @@ def find_identical_translations(xliff_file):
             continue
         
         # Get source and target elements
-        source = trans_unit.find('xliff:source', ns)
-        target = trans_unit.find('xliff:target', ns)
+        source = trans_unit.find(SOURCE_TAG)
+        target = trans_unit.find(TARGET_TAG)
         
         if source is not None and target is not None:
             # Skip if target has state="needs-translation"
@@ -52,8 +58,14 @@ def find_identical_translations(xliff_file):
             
             # Case 1: approved and no translate=no, do comma-splitting
             if approved_attr == 'yes' and translate_attr != 'no':
-                target_pieces = [piece.strip() for piece in target_text.split(',')]
-                matching_pieces = [piece for piece in target_pieces if piece and piece in source_text]
+                # Pieces match as substrings anywhere in the source (not just whole
+                # source pieces), so this stays a substring scan; one pass, no
+                # intermediate list, and nothing to do for an empty target
+                if target_text:
+                    matching_pieces = [piece for piece in map(str.strip, target_text.split(','))
+                                       if piece and piece in source_text]
+                else:
+                    matching_pieces = []
                 
                 if matching_pieces:
                     trans_unit_id = trans_unit.get('id', 'N/A')
@@ -151,25 +163,26 @@ Examples:
     # Write results to file
     if results:
         try:
-            with open(args.output_file, 'w', encoding='utf-8') as f:
-                f.write(f"Found {len(results)} trans-unit(s)\n")
-                f.write("=" * 80 + "\n\n")
+            # Build the report as one string per record and write it in one batch
+            separator = '=' * 80
+            lines = [f"Found {len(results)} trans-unit(s)\n{separator}\n\n"]
+            
+            current_type = None
+            for idx, item in enumerate(results, 1):
+                # Add section header when type changes
+                if item['type'] != current_type:
+                    current_type = item['type']
+                    lines.append(f"\n{separator}\nCASE: {current_type.upper()}\n{separator}\n\n")
                 
-                current_type = None
-                for idx, item in enumerate(results, 1):
-                    # Add section header when type changes
-                    if item['type'] != current_type:
-                        current_type = item['type']
-                        f.write(f"\n{'=' * 80}\n")
-                        f.write(f"CASE: {current_type.upper()}\n")
-                        f.write(f"{'=' * 80}\n\n")
-                    
-                    f.write(f"{idx}. ID: {item['id']}\n")
-                    f.write(f"   resname: {item['resname']}\n")
-                    f.write(f"   Source: {item['source']}\n")
-                    f.write(f"   Target: {item['target']}\n")
-                    f.write(f"   Matching pieces: {', '.join(item['matching_pieces'])}\n")
-                    f.write("\n")
+                lines.append(f"{idx}. ID: {item['id']}\n"
+                             f"   resname: {item['resname']}\n"
+                             f"   Source: {item['source']}\n"
+                             f"   Target: {item['target']}\n"
+                             f"   Matching pieces: {', '.join(item['matching_pieces'])}\n"
+                             f"\n")
+            
+            with open(args.output_file, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as f:
+                f.writelines(lines)
             
             print(f"Results written to {args.output_file}")
             print(f"Found {len(results)} trans-unit(s)")
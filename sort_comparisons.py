@@ -11,22 +11,33 @@ Usage:
 """
 
 import argparse
+import csv
 import sys
 import os
+from collections import Counter
+
+
+# Output file buffer size (1 MiB), so results are flushed in a few large writes
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Progress file buffer size, and how many sorted rows to buffer between flushes
+PROGRESS_BUFFER_SIZE = 1 << 16
+PROGRESS_FLUSH_ROWS = 25
 
 
 def read_tsv_file(input_file):
     """Read TSV file and return header and data rows."""
     try:
         with open(input_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        if not lines:
-            print("Error: Input file is empty.", file=sys.stderr)
-            sys.exit(1)
-        
-        header = lines[0].strip().split('\t')
-        data = [line.strip().split('\t') for line in lines[1:] if line.strip()]
+            header_line = f.readline()
+            
+            if not header_line:
+                print("Error: Input file is empty.", file=sys.stderr)
+                sys.exit(1)
+            
+            header = header_line.strip().split('\t')
+            # Read the remaining lines lazily, stripping each one only once
+            data = [line.split('\t') for line in map(str.strip, f) if line]
         
         return header, data
     except Exception as e:
@@ -34,27 +45,42 @@ def read_tsv_file(input_file):
         sys.exit(1)
 
 
-def display_row(row, col1_idx, col2_idx, header):
-    """Display the full row and highlight the specified columns."""
+def format_row_labels(header, col1_idx, col2_idx):
+    """Build the (label, marker) pair shown for each column, highlighting the specified columns."""
+    highlighted = {col1_idx, col2_idx}
+    return [(f"  {i}. {col_name}:", " <--" if i - 1 in highlighted else "")
+            for i, col_name in enumerate(header, 1)]
+
+
+def display_row(row, row_labels):
+    """Display the full row using labels from format_row_labels."""
     print("\n" + "=" * 80)
     print("Full row data:")
-    for i, (col_name, value) in enumerate(zip(header, row), 1):
-        marker = " <--" if i in [col1_idx + 1, col2_idx + 1] else ""
-        print(f"  {i}. {col_name}: {value}{marker}")
+    for (label, marker), value in zip(row_labels, row):
+        print(f"{label} {value}{marker}")
     print("=" * 80)
 
 
-def get_user_choice(group_chars):
+def format_group_menu(group_chars):
+    """Build the list of available groups shown before each prompt."""
+    lines = ["\nAvailable groups:", "  ` Create new group"]
+    for char, group_name in group_chars.items():
+        if char != '`':
+            lines.append(f"  {char} {group_name}")
+    return "\n".join(lines)
+
+
+def get_user_choice(group_chars, menu):
     """
     Prompt user to select groups using character keys.
     
+    Args:
+        group_chars: Mapping of character keys to group names (new groups are added to it)
+        menu: Group list to display, from format_group_menu
+    
     Returns: (list of group names, should_end_early)
     """
-    print("\nAvailable groups:")
-    print("  ` Create new group")
-    for char, group_name in group_chars.items():
-        if char != '`':
-            print(f"  {char} {group_name}")
+    print(menu)
     
     while True:
         try:
@@ -161,54 +187,88 @@ def sort_comparisons(input_file, col1, col2, output_file=None):
         'w': 'other'
     }
     
+    # Column labels and the group menu are formatted once, not per row; the
+    # menu is rebuilt only when a new group has been added
+    row_labels = format_row_labels(header, col1_idx, col2_idx)
+    menu = format_group_menu(group_chars)
+    menu_size = len(group_chars)
+    
     # Track group membership for each row (row_index -> set of group names)
     row_groups = {}
     
+    # Sorted rows are also appended to a progress file as they are assigned, so
+    # an interrupted session does not lose its work. The output file itself is
+    # written at the end, once the set of used group columns is known.
+    progress_file = output_file + '.partial'
+    try:
+        progress = open(progress_file, 'w', encoding='utf-8', buffering=PROGRESS_BUFFER_SIZE)
+    except Exception as e:
+        print(f"Error opening progress file: {e}", file=sys.stderr)
+        sys.exit(1)
+    
     # Process each row
     rows_processed = 0
-    for i, row in enumerate(data):
-        print(f"\n\n{'#' * 80}")
-        print(f"Row {i + 1} of {len(data)}")
-        
-        # Display the full row
-        display_row(row, col1_idx, col2_idx, header)
-        
-        # Get user's choice
-        selected_groups, should_end = get_user_choice(group_chars)
+    with progress:
+        progress_writer = csv.writer(progress, delimiter='\t', quoting=csv.QUOTE_NONE,
+                                     quotechar=None, lineterminator='\n')
+        progress_writer.writerow(header + ['Groups'])
         
-        if should_end:
-            print("\nEnding early. Saving partial results...")
-            rows_processed = i
-            data = data[:i]  # Only keep processed rows
-            break
-        
-        # Add row to selected groups
-        row_groups[i] = set(selected_groups) if selected_groups else set()
-        rows_processed = i + 1
-        
-        if selected_groups:
-            print(f"\n✓ Added to groups: {', '.join(selected_groups)}")
-        else:
-            print(f"\n✓ No groups selected for this row")
+        try:
+            for i, row in enumerate(data):
+                print(f"\n\n{'#' * 80}")
+                print(f"Row {i + 1} of {len(data)}")
+                
+                # Display the full row
+                display_row(row, row_labels)
+                
+                # Get user's choice
+                if len(group_chars) != menu_size:
+                    menu = format_group_menu(group_chars)
+                    menu_size = len(group_chars)
+                selected_groups, should_end = get_user_choice(group_chars, menu)
+                
+                if should_end:
+                    print("\nEnding early. Saving partial results...")
+                    rows_processed = i
+                    data = data[:i]  # Only keep processed rows
+                    break
+                
+                # Add row to selected groups
+                row_groups[i] = set(selected_groups) if selected_groups else set()
+                rows_processed = i + 1
+                
+                progress_writer.writerow(row + [', '.join(sorted(row_groups[i]))])
+                if rows_processed % PROGRESS_FLUSH_ROWS == 0:
+                    progress.flush()
+                
+                if selected_groups:
+                    print(f"\n✓ Added to groups: {', '.join(selected_groups)}")
+                else:
+                    print(f"\n✓ No groups selected for this row")
+        except KeyboardInterrupt:
+            print(f"\n\nInterrupted. Rows sorted so far are saved in: {progress_file}")
+            sys.exit(1)
     
     # Get list of all groups that were actually used
     all_groups = sorted(set(group_chars.values()))
-    used_groups = set()
+    # Count rows per group in one pass; every counted group was used
+    group_counts = Counter()
     for groups_set in row_groups.values():
-        used_groups.update(groups_set)
-    used_groups = sorted(used_groups)
+        group_counts.update(groups_set)
+    used_groups = sorted(group_counts)
     
     # Write output file
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            # Write header with group columns
-            f.write('\t'.join(header + used_groups) + '\n')
-            
-            # Write data with group membership columns
-            for i, row in enumerate(data):
-                groups_in_row = row_groups.get(i, set())
-                group_values = ['1' if group in groups_in_row else '0' for group in used_groups]
-                f.write('\t'.join(row + group_values) + '\n')
+        # Header with group columns, then data with group membership columns
+        lines = ['\t'.join(header + used_groups) + '\n']
+        for i, row in enumerate(data):
+            groups_in_row = row_groups.get(i, set())
+            group_values = ['1' if group in groups_in_row else '0' for group in used_groups]
+            lines.append('\t'.join(row + group_values) + '\n')
+        
+        with open(output_file, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as f:
+            f.writelines(lines)
+        os.remove(progress_file)
         
         print(f"\n\n{'=' * 80}")
         print(f"✓ Sorting complete!")
@@ -216,8 +276,7 @@ def sort_comparisons(input_file, col1, col2, output_file=None):
         print(f"✓ Output written to: {output_file}")
         print(f"✓ Groups used: {len(used_groups)}")
         for group_name in used_groups:
-            count = sum(1 for groups_set in row_groups.values() if group_name in groups_set)
-            print(f"  - {group_name}: {count} rows")
+            print(f"  - {group_name}: {group_counts[group_name]} rows")
     
     except Exception as e:
         print(f"\nError writing output file: {e}", file=sys.stderr)